@@ -4,6 +4,7 @@ import argparse
 import sys
 from pathlib import Path
 import time
+from player_index import PlayerIndex
 
 print("🔄 BATTLEFY AVATAR DOWNLOADER - INPUT FLEXÍVEL")
 print("=" * 60)
@@ -29,6 +30,8 @@ class BattlefyDownloader:
             print("❌ Nenhuma URL de avatar encontrada")
             return False
             
+        self._registrar_no_indice(urls)
+        
         print(f"3. 🚀 Baixando {len(urls)} avatares...")
         return self._baixar_avatares(urls)
     
@@ -56,6 +59,20 @@ class BattlefyDownloader:
         print(f"✅ Encontradas {len(urls)} URLs únicas")
         return urls
     
+    def _registrar_no_indice(self, urls):
+        user_ids = [self._extrair_user_id(url) for url in urls]
+        
+        try:
+            with PlayerIndex() as player_index:
+                player_index.registrar_user_ids(self.tournament_id, user_ids)
+            print(f"✅ {len([u for u in user_ids if u])} user IDs registrados no índice de jogadores")
+        except Exception as e:
+            print(f"⚠️  Índice de jogadores não atualizado: {e}")
+    
+    def _extrair_user_id(self, url):
+        user_id_match = re.search(r'user-imgs%2F([a-f0-9]+)%2F', url)
+        return user_id_match.group(1) if user_id_match else None
+    
     def _baixar_avatares(self, urls):
         sucessos = 0
         
@@ -72,9 +89,8 @@ class BattlefyDownloader:
     
     def _baixar_avatar(self, url, numero):
         try:
-            user_id_match = re.search(r'user-imgs%2F([a-f0-9]+)%2F', url)
-            if user_id_match:
-                user_id = user_id_match.group(1)
+            user_id = self._extrair_user_id(url)
+            if user_id:
                 nome_arquivo = f"avatar_{user_id}.jpg"
             else:
                 nome_arquivo = f"avatar_{numero:03d}.jpg"
@@ -1,15 +1,28 @@
 import requests
 import json
 import csv
+from datetime import datetime
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
+from player_index import PlayerIndex
 
 # Desativar avisos de SSL
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
+# Exportação colunar (Parquet) é opcional: requer pyarrow instalado
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = pc = ds = None
+
 # IDs do torneio
 tournament_id = "68a3db0a4f64b2003f7b4c3f"
 stage_id = "68a64aec397e4d002b97de80"
 
+# Pasta base dos datasets Parquet (um subdiretório por tabela)
+COLUMNAR_DIR = "bracket_parquet"
+
 def get_all_matches_with_details():
     """Obtém TODAS as partidas com detalhes completos"""
     print("=== OBTENDO TODAS AS PARTIDAS DA BRACKET ===")
@@ -220,6 +233,217 @@ def save_complete_bracket_data(matches, teams, tournament_info):
     
     print("✓ Times com jogadores salvos: TEAMS_WITH_PLAYERS.csv")
 
+def _to_int(valor):
+    """Converte scores/rounds para int, mantendo None quando ausente"""
+    try:
+        return int(valor) if valor is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _to_timestamp(valor):
+    """Converte datas ISO do Battlefy ('...Z') para datetime"""
+    if not isinstance(valor, str):
+        return None
+    try:
+        return datetime.fromisoformat(valor.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+def save_columnar_bracket_data(matches, teams, tournament_info):
+    """Salva partidas, times e jogadores em Parquet particionado por torneio"""
+    print("\n=== SALVANDO DADOS COLUNARES (PARQUET) ===")
+
+    if pa is None:
+        print("⚠ pyarrow não instalado - exportação Parquet ignorada (pip install pyarrow)")
+        return False
+
+    torneio = tournament_info.get('_id') or tournament_id
+    nomes_times = {
+        t.get('_id'): t.get('name') or t.get('teamName')
+        for t in teams
+    }
+    # O _id muda a cada torneio; persistentTeamID identifica o time na temporada
+    ids_persistentes = {
+        t.get('_id'): t.get('persistentTeamID') or t.get('_id')
+        for t in teams
+    }
+
+    # 1. Partidas (mesmas colunas do ALL_MATCHES_CSV.csv, porém tipadas)
+    matches_schema = pa.schema([
+        ('tournament_id', pa.string()),
+        ('stage_id', pa.string()),
+        ('match_id', pa.string()),
+        ('round', pa.int32()),
+        ('match_number', pa.int32()),
+        ('state', pa.string()),
+        ('scheduled_time', pa.timestamp('ms', tz='UTC')),
+        ('team1_id', pa.string()),
+        ('team1_persistent_id', pa.string()),
+        ('team1_name', pa.string()),
+        ('team1_score', pa.int32()),
+        ('team2_id', pa.string()),
+        ('team2_persistent_id', pa.string()),
+        ('team2_name', pa.string()),
+        ('team2_score', pa.int32()),
+        ('winner_team_id', pa.string()),
+        ('is_draw', pa.bool_())
+    ])
+
+    match_rows = []
+    for match in matches:
+        match_teams = [t for t in match.get('teams', []) if t and isinstance(t, dict)]
+        team1 = match_teams[0] if len(match_teams) > 0 else {}
+        team2 = match_teams[1] if len(match_teams) > 1 else {}
+        score1 = _to_int(team1.get('score'))
+        score2 = _to_int(team2.get('score'))
+
+        # Determinar vencedor (mesma regra do CSV)
+        winner_id = None
+        is_draw = None
+        if score1 is not None and score2 is not None:
+            is_draw = score1 == score2
+            if score1 > score2:
+                winner_id = team1.get('_id')
+            elif score2 > score1:
+                winner_id = team2.get('_id')
+
+        match_rows.append({
+            'tournament_id': torneio,
+            'stage_id': match.get('stageID') or stage_id,
+            'match_id': match.get('_id'),
+            'round': _to_int(match.get('round')),
+            'match_number': _to_int(match.get('matchNumber')),
+            'state': match.get('state'),
+            'scheduled_time': _to_timestamp(match.get('scheduledTime')),
+            'team1_id': team1.get('_id'),
+            'team1_persistent_id': ids_persistentes.get(team1.get('_id')) or team1.get('persistentTeamID') or team1.get('_id'),
+            'team1_name': nomes_times.get(team1.get('_id')),
+            'team1_score': score1,
+            'team2_id': team2.get('_id'),
+            'team2_persistent_id': ids_persistentes.get(team2.get('_id')) or team2.get('persistentTeamID') or team2.get('_id'),
+            'team2_name': nomes_times.get(team2.get('_id')),
+            'team2_score': score2,
+            'winner_team_id': winner_id,
+            'is_draw': is_draw
+        })
+
+    # 2. Times e 3. Jogadores (equivalente normalizado do TEAMS_WITH_PLAYERS.csv)
+    teams_schema = pa.schema([
+        ('tournament_id', pa.string()),
+        ('team_id', pa.string()),
+        ('persistent_team_id', pa.string()),
+        ('team_name', pa.string()),
+        ('player_count', pa.int32())
+    ])
+    players_schema = pa.schema([
+        ('tournament_id', pa.string()),
+        ('team_id', pa.string()),
+        ('player_id', pa.string()),
+        ('user_id', pa.string()),
+        ('name', pa.string()),
+        ('in_game_name', pa.string()),
+        ('username', pa.string())
+    ])
+
+    team_rows = []
+    player_rows = []
+    for team in teams:
+        players = team.get('players', [])
+        team_rows.append({
+            'tournament_id': torneio,
+            'team_id': team.get('_id'),
+            'persistent_team_id': ids_persistentes.get(team.get('_id')),
+            'team_name': nomes_times.get(team.get('_id')),
+            'player_count': len(players)
+        })
+        for player in players:
+            player_rows.append({
+                'tournament_id': torneio,
+                'team_id': team.get('_id'),
+                'player_id': player.get('_id'),
+                'user_id': player.get('userID'),
+                'name': player.get('name'),
+                'in_game_name': player.get('inGameName'),
+                'username': player.get('username')
+            })
+
+    # Partidas também particionadas por stage para que reexportar uma
+    # stage não apague as demais do mesmo torneio
+    tabelas = [
+        ('matches', pa.Table.from_pylist(match_rows, schema=matches_schema), ['tournament_id', 'stage_id']),
+        ('teams', pa.Table.from_pylist(team_rows, schema=teams_schema), ['tournament_id']),
+        ('players', pa.Table.from_pylist(player_rows, schema=players_schema), ['tournament_id'])
+    ]
+
+    for nome, tabela, particoes in tabelas:
+        ds.write_dataset(
+            tabela,
+            f"{COLUMNAR_DIR}/{nome}",
+            format='parquet',
+            partitioning=particoes,
+            partitioning_flavor='hive',
+            existing_data_behavior='delete_matching'
+        )
+        print(f"✓ {nome}: {tabela.num_rows} linhas salvas em {COLUMNAR_DIR}/{nome}/")
+
+    return True
+
+def load_columnar_dataset(nome):
+    """Abre um dataset Parquet (matches, teams ou players) de todos os torneios"""
+    if pa is None:
+        raise RuntimeError("pyarrow não instalado - necessário para ler os dados Parquet (pip install pyarrow)")
+
+    # Schema explícito: IDs só numéricos não devem virar inteiros
+    campos = [('tournament_id', pa.string())]
+    if nome == 'matches':
+        campos.append(('stage_id', pa.string()))
+    particoes = ds.partitioning(pa.schema(campos), flavor='hive')
+
+    return ds.dataset(f"{COLUMNAR_DIR}/{nome}", format='parquet', partitioning=particoes)
+
+def calculate_team_win_rates(tournament_ids=None):
+    """Calcula vitórias/partidas por time em vários torneios (agrupando pelo persistentTeamID)"""
+    if pa is None:
+        raise RuntimeError("pyarrow não instalado - necessário para calcular win rates (pip install pyarrow)")
+
+    dataset = load_columnar_dataset('matches')
+    filtro = ds.field('winner_team_id').is_valid() | ds.field('is_draw')
+    if tournament_ids:
+        filtro = filtro & ds.field('tournament_id').isin(tournament_ids)
+
+    partidas = dataset.to_table(
+        columns=[
+            'team1_id', 'team1_persistent_id', 'team1_name',
+            'team2_id', 'team2_persistent_id', 'team2_name',
+            'winner_team_id'
+        ],
+        filter=filtro
+    )
+
+    # Uma linha por (time, partida) para agregar de forma vetorizada; a
+    # vitória é comparada pelo _id do torneio, o agrupamento pelo ID persistente
+    por_time = pa.concat_tables([
+        pa.table({
+            'persistent_team_id': partidas[f'{lado}_persistent_id'],
+            'team_name': partidas[f'{lado}_name'],
+            'win': pc.fill_null(pc.equal(partidas[f'{lado}_id'], partidas['winner_team_id']), False).cast(pa.int32())
+        })
+        for lado in ('team1', 'team2')
+    ])
+    por_time = por_time.filter(pc.is_valid(por_time['persistent_team_id']))
+
+    resultado = por_time.group_by('persistent_team_id').aggregate([
+        ('team_name', 'max'),
+        ('win', 'sum'),
+        ('win', 'count')
+    ])
+    resultado = resultado.rename_columns([
+        {'team_name_max': 'team_name', 'win_sum': 'wins', 'win_count': 'matches'}.get(nome, nome)
+        for nome in resultado.column_names
+    ])
+    win_rate = pc.divide(resultado['wins'].cast(pa.float64()), resultado['matches'].cast(pa.float64()))
+    return resultado.append_column('win_rate', win_rate)
+
 def generate_summary_report(matches, teams):
     """Gera um relatório resumido"""
     print("\n=== RELATÓRIO RESUMIDO ===")
@@ -281,6 +505,17 @@ def main():
     
     # 4. Salvar TODOS os dados
     save_complete_bracket_data(all_matches, all_teams, tournament_info)
+    try:
+        save_columnar_bracket_data(all_matches, all_teams, tournament_info)
+    except Exception as e:
+        print(f"⚠ Erro ao salvar dados Parquet: {str(e)}")
+    
+    # Atualizar índice de jogadores entre torneios
+    try:
+        with PlayerIndex() as player_index:
+            player_index.registrar_times(tournament_info.get('_id') or tournament_id, all_teams)
+    except Exception as e:
+        print(f"⚠ Erro ao atualizar índice de jogadores: {str(e)}")
     
     # 5. Gerar relatório
     generate_summary_report(all_matches, all_teams)
@@ -312,6 +547,9 @@ def main():
     print("   - ALL_MATCHES_CSV.csv (Partidas em CSV)")
     print("   - TEAMS_WITH_PLAYERS.csv (Times e jogadores)")
     print("   - BRACKET_SUMMARY.json (Relatório resumido)")
+    print("   - PLAYER_INDEX.sqlite (Índice de jogadores entre torneios)")
+    if pa is not None:
+        print(f"   - {COLUMNAR_DIR}/ (Parquet: matches, teams, players por torneio)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
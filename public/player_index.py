@@ -0,0 +1,216 @@
+import sqlite3
+import re
+import argparse
+import unicodedata
+
+# Índice persistente de jogadores/times entre torneios.
+# Fica em disco (SQLite) para não carregar centenas de milhares de
+# jogadores em memória. As buscas por user_id e por nome usam índices
+# B-tree: O(log n) por consulta, não O(1) como um dict em memória, em
+# troca de memória constante. Cada participação tem uma chave inteira
+# (rowid), então os índices secundários guardam só (chave, rowid).
+INDEX_PATH = "PLAYER_INDEX.sqlite"
+
+# Versão do schema (PRAGMA user_version); a v1 usava chave composta em appearances
+SCHEMA_VERSION = 2
+
+def normalizar_nome(nome):
+    """Normaliza um nome in-game para comparação entre torneios"""
+    if not nome:
+        return ''
+    nome = unicodedata.normalize('NFKC', str(nome)).casefold()
+    return re.sub(r'\s+', ' ', nome).strip()
+
+class PlayerIndex:
+    def __init__(self, caminho=INDEX_PATH):
+        self.conn = sqlite3.connect(caminho)
+        try:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self._criar_tabelas()
+        except Exception:
+            self.conn.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _criar_tabelas(self):
+        versao = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if versao < SCHEMA_VERSION:
+            # Elencos são reconstruídos ao reimportar os torneios;
+            # avatar_users não mudou de formato e é mantida
+            self.conn.executescript("""
+                DROP TABLE IF EXISTS appearance_names;
+                DROP TABLE IF EXISTS appearances;
+            """)
+
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS appearances (
+                id INTEGER PRIMARY KEY,
+                tournament_id TEXT NOT NULL,
+                team_id TEXT,
+                player_id TEXT,
+                user_id TEXT,
+                in_game_name TEXT,
+                team_name TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_appearances_tournament ON appearances (tournament_id);
+            CREATE INDEX IF NOT EXISTS idx_appearances_user ON appearances (user_id) WHERE user_id IS NOT NULL;
+
+            -- Um nome normalizado por linha (inGameName, username, name)
+            CREATE TABLE IF NOT EXISTS appearance_names (
+                appearance_id INTEGER NOT NULL,
+                name_key TEXT NOT NULL,
+                PRIMARY KEY (appearance_id, name_key)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_appearance_names_key ON appearance_names (name_key);
+
+            -- Só avistamentos via avatar; elencos ficam em appearances
+            CREATE TABLE IF NOT EXISTS avatar_users (
+                user_id TEXT NOT NULL,
+                tournament_id TEXT NOT NULL,
+                PRIMARY KEY (user_id, tournament_id)
+            ) WITHOUT ROWID;
+
+            PRAGMA user_version = {SCHEMA_VERSION};
+        """)
+        self.conn.commit()
+
+    def registrar_times(self, tournament_id, teams):
+        """Atualiza o índice com a saída de get_all_teams() de um torneio
+
+        Todos os nomes distintos do jogador (inGameName, username, name)
+        ficam pesquisáveis por buscar_por_nome.
+        """
+        # Lista vazia indica falha na API: não apagar o elenco já indexado
+        if not teams:
+            print(f"⚠ Índice de jogadores: nenhum time recebido ({tournament_id}), índice mantido")
+            return 0
+
+        jogadores = []
+        vistos = set()
+        for team in teams:
+            team_id = team.get('_id')
+            team_name = team.get('name') or team.get('teamName')
+            for player in team.get('players', []):
+                user_id = player.get('userID') or None
+                nomes = [player.get('inGameName'), player.get('username'), player.get('name')]
+                name_keys = {normalizar_nome(n) for n in nomes} - {''}
+
+                # Sem user ID nem nome o jogador não pode ser buscado
+                if not user_id and not name_keys:
+                    continue
+
+                nome = next((n for n in nomes if normalizar_nome(n)), None)
+                chave = (team_id, player.get('_id'), user_id, nome)
+                if chave in vistos:
+                    continue
+                vistos.add(chave)
+
+                jogadores.append(((tournament_id, team_id, player.get('_id'), user_id, nome, team_name), name_keys))
+
+        # Substitui o elenco do torneio inteiro: reimportar não duplica
+        # e remove jogadores que saíram dos times
+        with self.conn:
+            self.conn.execute("""
+                DELETE FROM appearance_names WHERE appearance_id IN
+                    (SELECT id FROM appearances WHERE tournament_id = ?)
+            """, (tournament_id,))
+            self.conn.execute("DELETE FROM appearances WHERE tournament_id = ?", (tournament_id,))
+
+            for linha, name_keys in jogadores:
+                cursor = self.conn.execute(
+                    "INSERT INTO appearances (tournament_id, team_id, player_id, user_id, in_game_name, team_name) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    linha
+                )
+                self.conn.executemany(
+                    "INSERT INTO appearance_names VALUES (?, ?)",
+                    [(cursor.lastrowid, name_key) for name_key in name_keys]
+                )
+
+        print(f"✓ Índice de jogadores: {len(jogadores)} jogadores registrados ({tournament_id})")
+        return len(jogadores)
+
+    def registrar_user_ids(self, tournament_id, user_ids):
+        """Registra user IDs vistos num torneio (ex.: extraídos das URLs de avatar)"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO avatar_users VALUES (?, ?)",
+                [(user_id, tournament_id) for user_id in set(user_ids) if user_id]
+            )
+
+    def buscar_por_user_id(self, user_id):
+        """Retorna todas as participações de um user ID do Battlefy"""
+        cursor = self.conn.execute(
+            "SELECT tournament_id, team_id, team_name, in_game_name FROM appearances WHERE user_id = ?",
+            (user_id,)
+        )
+        historico = [self._linha_para_dict(linha, user_id) for linha in cursor]
+
+        # Torneios onde só o avatar foi visto (sem elenco importado)
+        com_time = {h['tournament_id'] for h in historico}
+        cursor = self.conn.execute(
+            "SELECT tournament_id FROM avatar_users WHERE user_id = ?",
+            (user_id,)
+        )
+        for (tournament_id,) in cursor:
+            if tournament_id not in com_time:
+                historico.append(self._linha_para_dict((tournament_id, None, None, None), user_id))
+
+        return historico
+
+    def buscar_por_nome(self, nome):
+        """Retorna todas as participações de um nome (inGameName, username ou name)"""
+        name_key = normalizar_nome(nome)
+        if not name_key:
+            return []
+
+        cursor = self.conn.execute("""
+            SELECT a.tournament_id, a.team_id, a.team_name, a.in_game_name, a.user_id
+            FROM appearance_names n JOIN appearances a ON a.id = n.appearance_id
+            WHERE n.name_key = ?
+        """, (name_key,))
+        return [self._linha_para_dict(linha[:4], linha[4]) for linha in cursor]
+
+    def _linha_para_dict(self, linha, user_id):
+        tournament_id, team_id, team_name, in_game_name = linha
+        return {
+            'tournament_id': tournament_id,
+            'team_id': team_id or None,
+            'team_name': team_name,
+            'user_id': user_id or None,
+            'in_game_name': in_game_name
+        }
+
+    def fechar(self):
+        self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Consulta o índice de jogadores entre torneios')
+    parser.add_argument('--user-id', help='User ID do Battlefy')
+    parser.add_argument('--nome', help='Nome in-game do jogador')
+    parser.add_argument('--index', default=INDEX_PATH, help='Arquivo do índice')
+
+    args = parser.parse_args()
+
+    if not args.user_id and not normalizar_nome(args.nome):
+        parser.error('informe --user-id ou --nome')
+
+    with PlayerIndex(args.index) as index:
+        historico = index.buscar_por_user_id(args.user_id) if args.user_id else index.buscar_por_nome(args.nome)
+
+    if not historico:
+        print("❌ Jogador não encontrado no índice")
+        return
+
+    print(f"✅ {len(historico)} participações encontradas:")
+    for h in historico:
+        print(f"  Torneio={h['tournament_id']} Time={h['team_name'] or h['team_id'] or '-'} "
+              f"Jogador={h['in_game_name'] or '-'} UserID={h['user_id'] or '-'}")
+
+if __name__ == "__main__":
+    main()